@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from absl.testing import absltest
 from absl.testing import parameterized
 import numpy as np
@@ -24,221 +26,86 @@ from tensorflow_federated.python.core.impl.types import computation_types
 from tensorflow_federated.python.core.impl.types import placements
 from tensorflow_federated.python.core.impl.types import type_test_utils
 
-
-def _count_intrinsics(comp, uri):
-  def _predicate(comp):
-    return (
-        isinstance(comp, building_blocks.Intrinsic)
-        and uri is not None
-        and comp.uri == uri
-    )
-
-  return tree_analysis.count(comp, _predicate)
+_URI_AGG = intrinsic_defs.FEDERATED_AGGREGATE.uri
+_URI_MAX = intrinsic_defs.FEDERATED_MAX.uri
+_URI_MEAN = intrinsic_defs.FEDERATED_MEAN.uri
+_URI_MIN = intrinsic_defs.FEDERATED_MIN.uri
+_URI_SUM = intrinsic_defs.FEDERATED_SUM.uri
+_URI_WMEAN = intrinsic_defs.FEDERATED_WEIGHTED_MEAN.uri
+_URI_DIVIDE = intrinsic_defs.GENERIC_DIVIDE.uri
+_URI_MULTIPLY = intrinsic_defs.GENERIC_MULTIPLY.uri
+_URI_PLUS = intrinsic_defs.GENERIC_PLUS.uri
+
+_CLIENTS_F32 = computation_types.FederatedType(np.float32, placements.CLIENTS)
+_SERVER_F32 = computation_types.FederatedType(np.float32, placements.SERVER)
+_AGG_FTYPE = computation_types.FunctionType(_CLIENTS_F32, _SERVER_F32)
+_WMEAN_FTYPE = computation_types.FunctionType((_CLIENTS_F32,) * 2, _SERVER_F32)
+_GENERIC_BIN_FTYPE = computation_types.FunctionType(
+    [np.float32, np.float32], np.float32
+)
+
+
+def _intrinsic_uri_histogram(comp):
+  """Returns a `collections.Counter` of the intrinsic URIs in `comp`."""
+  histogram = collections.Counter()
+  stack = collections.deque([comp])
+  while stack:
+    node = stack.pop()
+    # pylint: disable=unidiomatic-typecheck
+    if type(node) is building_blocks.Intrinsic:
+      histogram[node.uri] += 1
+    # pylint: enable=unidiomatic-typecheck
+    stack.extend(node.children())
+  return histogram
+
+
+def _reduce(uri, type_signature):
+  """Reduces an `Intrinsic` with `uri` and `type_signature` to its body."""
+  comp = building_blocks.Intrinsic(uri, type_signature)
+  return tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
 
 
 class ReplaceIntrinsicsWithBodiesTest(parameterized.TestCase):
 
-  def test_raises_on_none(self):
-    with self.assertRaises(TypeError):
-      tensorflow_tree_transformations.replace_intrinsics_with_bodies(None)
-
-  def test_federated_mean_reduces_to_aggregate(self):
-    uri = intrinsic_defs.FEDERATED_MEAN.uri
-
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType(
-            computation_types.FederatedType(np.float32, placements.CLIENTS),
-            computation_types.FederatedType(np.float32, placements.SERVER),
-        ),
-    )
-
-    count_means_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_means_after_reduction = _count_intrinsics(reduced, uri)
-    count_aggregations = _count_intrinsics(
-        reduced, intrinsic_defs.FEDERATED_AGGREGATE.uri
-    )
-    self.assertTrue(modified)
-    type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_means_before_reduction, 0)
-    self.assertEqual(count_means_after_reduction, 0)
-    self.assertGreater(count_aggregations, 0)
-
-  def test_federated_weighted_mean_reduces_to_aggregate(self):
-    uri = intrinsic_defs.FEDERATED_WEIGHTED_MEAN.uri
-
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType(
-            (computation_types.FederatedType(np.float32, placements.CLIENTS),)
-            * 2,
-            computation_types.FederatedType(np.float32, placements.SERVER),
-        ),
-    )
-
-    count_means_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_aggregations = _count_intrinsics(
-        reduced, intrinsic_defs.FEDERATED_AGGREGATE.uri
-    )
-    count_means_after_reduction = _count_intrinsics(reduced, uri)
-    self.assertTrue(modified)
-    type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_means_before_reduction, 0)
-    self.assertEqual(count_means_after_reduction, 0)
-    self.assertGreater(count_aggregations, 0)
-
-  def test_federated_min_reduces_to_aggregate(self):
-    uri = intrinsic_defs.FEDERATED_MIN.uri
-
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType(
-            computation_types.FederatedType(np.float32, placements.CLIENTS),
-            computation_types.FederatedType(np.float32, placements.SERVER),
-        ),
-    )
-
-    count_min_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_min_after_reduction = _count_intrinsics(reduced, uri)
-    count_aggregations = _count_intrinsics(
-        reduced, intrinsic_defs.FEDERATED_AGGREGATE.uri
-    )
-    self.assertTrue(modified)
-    type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_min_before_reduction, 0)
-    self.assertEqual(count_min_after_reduction, 0)
-    self.assertGreater(count_aggregations, 0)
-
-  def test_federated_max_reduces_to_aggregate(self):
-    uri = intrinsic_defs.FEDERATED_MAX.uri
-
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType(
-            computation_types.FederatedType(np.float32, placements.CLIENTS),
-            computation_types.FederatedType(np.float32, placements.SERVER),
-        ),
-    )
-
-    count_max_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_max_after_reduction = _count_intrinsics(reduced, uri)
-    count_aggregations = _count_intrinsics(
-        reduced, intrinsic_defs.FEDERATED_AGGREGATE.uri
-    )
+  def _assert_reduced_to_aggregate(self, uri, type_signature):
+    reduced, modified = _reduce(uri, type_signature)
+    histogram = _intrinsic_uri_histogram(reduced)
     self.assertTrue(modified)
     type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_max_before_reduction, 0)
-    self.assertEqual(count_max_after_reduction, 0)
-    self.assertGreater(count_aggregations, 0)
-
-  def test_federated_sum_reduces_to_aggregate(self):
-    uri = intrinsic_defs.FEDERATED_SUM.uri
-
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType(
-            computation_types.FederatedType(np.float32, placements.CLIENTS),
-            computation_types.FederatedType(np.float32, placements.SERVER),
-        ),
+        type_signature, reduced.type_signature
     )
+    self.assertEqual(histogram[uri], 0)
+    self.assertGreater(histogram[_URI_AGG], 0)
 
-    count_sum_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_sum_after_reduction = _count_intrinsics(reduced, uri)
-    count_aggregations = _count_intrinsics(
-        reduced, intrinsic_defs.FEDERATED_AGGREGATE.uri
-    )
-    self.assertTrue(modified)
-    type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_sum_before_reduction, 0)
-    self.assertEqual(count_sum_after_reduction, 0)
-    self.assertGreater(count_aggregations, 0)
-
-  def test_generic_divide_reduces(self):
-    uri = intrinsic_defs.GENERIC_DIVIDE.uri
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType([np.float32, np.float32], np.float32),
-    )
-
-    count_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_after_reduction = _count_intrinsics(reduced, uri)
-
-    self.assertTrue(modified)
-    type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_before_reduction, 0)
-    self.assertEqual(count_after_reduction, 0)
-    tree_analysis.check_contains_only_reducible_intrinsics(reduced)
-
-  def test_generic_multiply_reduces(self):
-    uri = intrinsic_defs.GENERIC_MULTIPLY.uri
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType([np.float32, np.float32], np.float32),
-    )
-
-    count_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_after_reduction = _count_intrinsics(reduced, uri)
-
-    self.assertTrue(modified)
-    type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
-    )
-    self.assertGreater(count_before_reduction, 0)
-    self.assertEqual(count_after_reduction, 0)
-    tree_analysis.check_contains_only_reducible_intrinsics(reduced)
-
-  def test_generic_plus_reduces(self):
-    uri = intrinsic_defs.GENERIC_PLUS.uri
-    comp = building_blocks.Intrinsic(
-        uri,
-        computation_types.FunctionType([np.float32, np.float32], np.float32),
-    )
+  def test_raises_on_none(self):
+    with self.assertRaises(TypeError):
+      tensorflow_tree_transformations.replace_intrinsics_with_bodies(None)
 
-    count_before_reduction = _count_intrinsics(comp, uri)
-    reduced, modified = (
-        tensorflow_tree_transformations.replace_intrinsics_with_bodies(comp)
-    )
-    count_after_reduction = _count_intrinsics(reduced, uri)
+  @parameterized.named_parameters(
+      ('mean', _URI_MEAN),
+      ('min', _URI_MIN),
+      ('max', _URI_MAX),
+      ('sum', _URI_SUM),
+  )
+  def test_federated_reduces_to_aggregate(self, uri):
+    self._assert_reduced_to_aggregate(uri, _AGG_FTYPE)
 
+  def test_federated_weighted_mean_reduces_to_aggregate(self):
+    self._assert_reduced_to_aggregate(_URI_WMEAN, _WMEAN_FTYPE)
+
+  @parameterized.named_parameters(
+      ('divide', _URI_DIVIDE),
+      ('multiply', _URI_MULTIPLY),
+      ('plus', _URI_PLUS),
+  )
+  def test_generic_reduces(self, uri):
+    reduced, modified = _reduce(uri, _GENERIC_BIN_FTYPE)
+    histogram = _intrinsic_uri_histogram(reduced)
     self.assertTrue(modified)
     type_test_utils.assert_types_identical(
-        comp.type_signature, reduced.type_signature
+        _GENERIC_BIN_FTYPE, reduced.type_signature
     )
-    self.assertGreater(count_before_reduction, 0)
-    self.assertEqual(count_after_reduction, 0)
+    self.assertEqual(histogram[uri], 0)
     tree_analysis.check_contains_only_reducible_intrinsics(reduced)
 
 